@@ -1,6 +1,108 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
-import random
+
+_rng = np.random.default_rng()
+
+# Set to True to have Die.roll use the numba-compiled CDF search; numba is only imported on first use
+use_numba = False
+_compiled_search_cdf = None
+
+def _search_cdf(cdf, u):
+    """
+    Finds the face index for each uniform draw by binary search of the CDF, like np.searchsorted(side='right').
+    
+    Parameters:
+        cdf (numpy array): Cumulative weights of the faces.
+        u (numpy array): Uniform draws scaled to the total weight.
+    
+    Returns:
+        numpy array: The index of the rolled face for each draw.
+    """
+    idx = np.empty(u.shape[0], dtype=np.int64)
+    for i in range(u.shape[0]):
+        lo, hi = 0, cdf.shape[0]
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if cdf[mid] <= u[i]:
+                lo = mid + 1
+            else:
+                hi = mid
+        idx[i] = lo
+    return idx
+
+def _numba_search_cdf():
+    """
+    Returns _search_cdf compiled with numba, importing numba and compiling it the first time it is needed.
+    """
+    global _compiled_search_cdf
+    if _compiled_search_cdf is None:
+        from numba import njit
+        _compiled_search_cdf = njit(cache=True)(_search_cdf)
+    return _compiled_search_cdf
+
+def _sample_die(p, rolls, seed_seq):
+    """
+    Rolls one die using its own independent random stream, in a worker process or in the game's process.
+    
+    Parameters:
+        p (numpy array): The probabilities of the die's faces.
+        rolls (int): The number of times to roll the die.
+        seed_seq (numpy.random.SeedSequence): Seed for this die's generator.
+    
+    Returns:
+        numpy array: The index of the rolled face for each roll.
+    """
+    rng = np.random.default_rng(seed_seq)
+    # Send back int32 indices to halve the data copied back to the parent process
+    return rng.choice(p.size, size=rolls, p=p).astype(np.int32)
+
+def _encode_faces(face_arrays):
+    """
+    Builds one sorted table of every face in a game and encodes each die's faces as int32 codes into it.
+    
+    Parameters:
+        face_arrays (list): The faces (numpy array) of each die.
+    
+    Returns:
+        tuple: The face table (numpy array) and a list with the codes (numpy array) of each die's faces.
+    """
+    if not face_arrays:
+        return np.empty(0), []
+    
+    all_faces = np.concatenate([faces.astype(object) for faces in face_arrays])
+    if len({faces.dtype for faces in face_arrays}) == 1 and face_arrays[0].dtype != object:
+        table = np.unique(all_faces.astype(face_arrays[0].dtype))
+        codes = np.searchsorted(table, all_faces.astype(face_arrays[0].dtype))
+    else:
+        # Faces of different types can't share one numpy dtype, so they go in an object table instead
+        codes, table = pd.factorize(all_faces, sort=True)
+    
+    codes = codes.astype(np.int32)
+    return table, np.split(codes, np.cumsum([faces.size for faces in face_arrays])[:-1])
+
+def _count_rows(arr, sort=True):
+    """
+    Counts the distinct rows of a 2D array.
+    
+    Parameters:
+        arr (numpy array): A 2D array with one outcome per die in each row.
+        sort (bool): Whether to order the rows by count, most frequent first. Defaults to True.
+    
+    Returns:
+        tuple: The distinct rows (2D numpy array) and their counts (numpy array).
+    """
+    # View each row as a single record so np.unique groups whole rows at once
+    arr = np.ascontiguousarray(arr)
+    records = arr.view([('', arr.dtype)] * arr.shape[1]).ravel()
+    uniq, counts = np.unique(records, return_counts=True)
+    rows = uniq.view(arr.dtype).reshape(-1, arr.shape[1])
+    if not sort:
+        return rows, counts
+    order = np.argsort(-counts, kind='stable')
+    return rows[order], counts[order]
 
 class Die:
     """
@@ -11,12 +113,13 @@ class Die:
         weights (numpy array): Array of weights corresponding to the faces (default 1.0 for each).
     """
     
-    def __init__(self, faces):
+    def __init__(self, faces, seed=None):
         """
         Initializes the Die object with faces and default weights set to 1.0.
         
         Parameters:
             faces (numpy array): A numpy array of distinct faces (strings or numbers).
+            seed (int, optional): Seed for the die's own random generator, for reproducible rolls.
         
         Raises:
             TypeError: If faces is not a numpy array.
@@ -25,12 +128,17 @@ class Die:
         if not isinstance(faces, np.ndarray):
             raise TypeError("Faces must be a numpy array.")
         
-        if len(faces) != len(np.unique(faces)):
+        sorted_faces = np.sort(faces, axis=None)
+        if np.any(sorted_faces[1:] == sorted_faces[:-1]):
             raise ValueError("Faces must be distinct.")
         
         self.faces = faces
         self.weights = np.ones(len(faces))  # default weights are 1.0 for each face
-        self.df = pd.DataFrame({'faces': faces, 'weights': self.weights}).set_index('faces')
+        self._cdf = np.cumsum(self.weights)  # cached so rolls don't rebuild it every call
+        total = self.weights.sum()  # unlike _cdf[-1], also defined for a die with no faces
+        self._p = self.weights / total if total > 0 else None
+        self._face_to_idx = {face: i for i, face in enumerate(faces)}
+        self._rng = _rng if seed is None else np.random.default_rng(seed)
 
     def change_weight(self, face, new_weight):
         """
@@ -43,14 +151,37 @@ class Die:
         Raises:
             IndexError: If the face is not a valid face on the die.
             TypeError: If new_weight is not a numeric type.
+            ValueError: If new_weight is negative, infinite or NaN.
         """
-        if face not in self.faces:
+        if face not in self._face_to_idx:
             raise IndexError(f"Face '{face}' not found in die.")
         
         if not isinstance(new_weight, (int, float)):
             raise TypeError("Weight must be a numeric value.")
         
-        self.df.loc[face, 'weights'] = new_weight
+        if not 0 <= new_weight < float('inf'):
+            raise ValueError("Weight must be a finite, non-negative value.")
+        
+        # Replace rather than modify the weights so states handed out by show_state stay unchanged
+        weights = self.weights.copy()
+        weights[self._face_to_idx[face]] = new_weight
+        self.weights = weights
+        self._cdf = np.cumsum(self.weights)
+        total = self.weights.sum()  # unlike _cdf[-1], also defined for a die with no faces
+        self._p = self.weights / total if total > 0 else None
+
+    def _roll_codes(self, times):
+        """
+        Rolls the die a given number of times, returning the index of each rolled face in faces.
+        """
+        # Same check as Game.play, so a die that can't be played can't be rolled either
+        if self._p is None:
+            raise ValueError("The die's weights must add up to a positive total.")
+        
+        u = self._rng.random(times) * self._cdf[-1]
+        if use_numba:
+            return _numba_search_cdf()(self._cdf, u).astype(np.int32)
+        return np.searchsorted(self._cdf, u, side='right').astype(np.int32)
 
     def roll(self, times=1):
         """
@@ -60,15 +191,23 @@ class Die:
             times (int): The number of times the die should be rolled. Defaults to 1.
         
         Returns:
-            list: A list of rolled faces.
+            numpy array: An array of rolled faces.
+        
+        Raises:
+            ValueError: If the die's weights do not add up to a positive total.
         """
-        return random.choices(self.faces, weights=self.df['weights'], k=times)
+        return self.faces[self._roll_codes(times)]
 
     def show_state(self):
         """
-        Returns a copy of the die's current state (faces and weights).
+        Returns a read-only view of the die's current state (faces and weights).
+        
+        Returns:
+            pandas.DataFrame: A DataFrame indexed by face with a 'weights' column.
         """
-        return self.df.copy()
+        weights = self.weights.view()
+        weights.flags.writeable = False
+        return pd.DataFrame({'weights': weights}, index=pd.Index(self.faces, name='faces', copy=False), copy=False)
 
     
     
@@ -78,21 +217,66 @@ class Game:
     
     Attributes:
         dice (list): A list of Die objects with similar faces.
+        results (pandas.DataFrame): The results of the most recent play in wide format, or None before the first play.
+        parallel_threshold (int or None): Total number of samples above which play rolls the dice in separate
+            processes when more than one CPU is available. None (the default) always rolls them in this process.
     """
     
-    def __init__(self, dice):
+    # Off by default: no multi-core measurement yet shows the worker processes paying for their startup and copies
+    parallel_threshold = None
+    
+    def __init__(self, dice, seed=None):
         """
         Initializes the Game object with a list of Die objects.
         
         Parameters:
             dice (list): A list of Die objects with the same faces.
+            seed (int, optional): Seed for the game's own random generator, for reproducible plays.
         
         """
         if not all(isinstance(die, Die) for die in dice):
             raise ValueError("All elements must be instances of the Die class.")
         
         self.dice = dice
-        self.results = None
+        self._rng = _rng if seed is None else np.random.default_rng(seed)
+        
+        # Rolls are stored as int32 codes into the face table built by the most recent play
+        self._faces = None
+        self._column_dtypes = None
+        self._codes = None
+        self._results = None
+
+    @property
+    def results(self):
+        """
+        The results of the most recent play as a wide DataFrame, built from the face codes on first access.
+        """
+        if self._results is None and self._codes is not None:
+            rolls, n_dice = self._codes.shape
+            columns = [f"Die {i}" for i in range(n_dice)]
+            if self._column_dtypes is None:
+                values = self._faces[self._codes]
+            else:
+                # Dice of different types share an object table, so each column is cast back to its die's type
+                values = {column: self._faces[self._codes[:, i]].astype(dtype)
+                          for i, (column, dtype) in enumerate(zip(columns, self._column_dtypes))}
+            self._results = pd.DataFrame(values, columns=columns, index=pd.RangeIndex(1, rolls + 1, name='Roll'))
+        return self._results
+
+    @results.setter
+    def results(self, results):
+        # Results assigned directly are encoded the same way as played ones so they can still be analyzed
+        if results is not None and results.isna().to_numpy().any():
+            raise ValueError("Results must not contain missing values.")
+        
+        self._results = results
+        if results is None:
+            self._faces = self._column_dtypes = self._codes = None
+            return
+        values = results.to_numpy(dtype=object)
+        codes, self._faces = pd.factorize(values.ravel(), sort=True)
+        self._codes = codes.astype(np.int32).reshape(values.shape)
+        self._column_dtypes = None if results.dtypes.nunique() == 1 else list(results.dtypes)
 
     def play(self, rolls):
         """
@@ -102,19 +286,53 @@ class Game:
             rolls (int): The number of times each die should be rolled.
         
         Saves the results as a DataFrame in wide format.
-        """
-        results = []
-        for roll in range(rolls):
-            roll_results = []
-            for i, die in enumerate(self.dice):
-                outcome=die.roll(1)[0]
-                roll_results.append(outcome)
-            results.append(roll_results)
         
-        # Convert results to DataFrame with roll number as index and die number as columns
-        self.results = pd.DataFrame(results, columns=[f"Die {i}" for i in range(len(self.dice))])
-        self.results.index = range(1, len(self.results) + 1)
-        self.results.index.name = 'Roll'
+        Raises:
+            ValueError: If the game has no dice, or a die's weights do not add up to a positive total.
+        """
+        if not self.dice:
+            raise ValueError("The game has no dice to roll.")
+        
+        if any(die._p is None for die in self.dice):
+            raise ValueError("Every die's weights must add up to a positive total.")
+        
+        # Rebuilt on every play so dice added to the game after it was created are included
+        face_arrays = [die.faces for die in self.dice]
+        faces, die_codes = _encode_faces(face_arrays)
+        column_dtypes = [f.dtype for f in face_arrays]
+        if all(dtype == faces.dtype for dtype in column_dtypes):
+            column_dtypes = None
+        
+        n_dice = len(self.dice)
+        first = self.dice[0]
+        # Checked on every play since weights can change after the game is created
+        homogeneous = all(np.array_equal(die.faces, first.faces) and np.array_equal(die.weights, first.weights)
+                          for die in self.dice[1:])
+        if homogeneous:
+            # Identical dice can all be rolled in a single call
+            idx = self._rng.choice(first._p.size, size=(rolls, n_dice), p=first._p)
+            codes = die_codes[0][idx]
+        else:
+            # Each die gets its own child stream, so a seeded game rolls the same faces whichever path runs
+            codes = np.empty((rolls, n_dice), dtype=np.int32)
+            seeds = self._rng.bit_generator.seed_seq.spawn(n_dice)
+            p = [die._p for die in self.dice]
+            if (self.parallel_threshold is not None and n_dice > 1 and rolls * n_dice > self.parallel_threshold
+                    and (os.cpu_count() or 1) > 1):
+                # Dice are independent, so large plays can roll each one in its own process
+                with ProcessPoolExecutor(max_workers=min(n_dice, os.cpu_count())) as pool:
+                    columns = list(pool.map(_sample_die, p, [rolls] * n_dice, seeds))
+            else:
+                # Sample each die's column in a single vectorized call instead of rolling one face at a time
+                columns = [_sample_die(p[i], rolls, seeds[i]) for i in range(n_dice)]
+            for i, column in enumerate(columns):
+                codes[:, i] = die_codes[i][column]
+        
+        # The results DataFrame is only materialized from the codes when it is asked for
+        self._faces = faces
+        self._column_dtypes = column_dtypes
+        self._codes = codes
+        self._results = None
     
     def show_results(self, form="wide"):
         """
@@ -129,16 +347,26 @@ class Game:
         Raises:
             ValueError: If the form is not 'wide' or 'narrow'.
         """
-        if self.results is None:
+        if self._codes is None:
             raise ValueError("No results available. Please play the game first.")
         
         if form == "wide":
             return self.results.copy()
         
         elif form == "narrow":
-            narrow_results = self.results.melt(ignore_index=False, var_name='Die', value_name='Outcome')
-            narrow_results.reset_index(inplace=True)
-            narrow_results.set_index(['Roll', 'Die'], inplace=True)
+            rolls, n_dice = self._codes.shape
+            if self._results is None and self._column_dtypes is None:
+                # Build the long form straight from the face codes, without materializing the wide results
+                roll_labels, die_labels = np.arange(1, rolls + 1), [f"Die {i}" for i in range(n_dice)]
+                outcomes = self._faces[self._codes.ravel()]
+            else:
+                # Reuse the wide results, which also carry the per-die types of dice with different face types
+                wide = self.results
+                roll_labels, die_labels = wide.index.to_numpy(), wide.columns.to_numpy()
+                outcomes = wide.to_numpy(dtype=object if self._column_dtypes else None).ravel()
+            index = pd.MultiIndex.from_arrays([np.repeat(roll_labels, n_dice), np.tile(die_labels, rolls)],
+                                              names=['Roll', 'Die'])
+            narrow_results = pd.DataFrame({'Outcome': outcomes}, index=index)
             return narrow_results
         
         else:
@@ -169,9 +397,70 @@ class Analyzer:
         
         self.game = game
         
-        if self.game.results is None:
+        if self.game._codes is None:
             raise ValueError("No game results available. Please play the game first.")
         
+        # Analyses are cached until the game is played again
+        self._codes = self.game._codes
+        self._cache = {}
+
+    def _results_codes(self):
+        """
+        Returns the game's results as face codes, clearing the cache if the game has been played again.
+        """
+        if self.game._codes is not self._codes:
+            self._codes = self.game._codes
+            self._cache = {}
+        return self._codes
+
+    def _jackpot_count(self):
+        """
+        Counts the rolls where every die rolled the same face.
+        """
+        codes = self._results_codes()
+        if 'jackpot' not in self._cache:
+            jackpot = np.all(codes[:, 1:] == codes[:, :1], axis=1)
+            self._cache['jackpot'] = int(jackpot.sum())
+        return self._cache['jackpot']
+
+    def _face_counts(self):
+        """
+        Counts each face in each roll, returning a (rolls, faces) array ordered like the game's face table.
+        """
+        codes = self._results_codes()
+        if 'face_counts' not in self._cache:
+            # Offset each roll's codes into its own block of bins so one bincount tallies every roll
+            rolls, n_faces = codes.shape[0], self.game._faces.size
+            flat = (np.arange(rolls)[:, None] * n_faces + codes).ravel()
+            counts = np.bincount(flat, minlength=rolls * n_faces).reshape(rolls, n_faces)
+            counts.flags.writeable = False
+            self._cache['face_counts'] = counts
+        return self._cache['face_counts']
+
+    def _combo_counts(self, sort=True):
+        """
+        Counts distinct combinations of faces, returning the combinations (one per row) and their counts.
+        """
+        codes = self._results_codes()
+        if ('combo_counts', sort) not in self._cache:
+            # The face table is sorted, so sorting codes sorts the faces they stand for
+            rows, counts = _count_rows(np.sort(codes, axis=1), sort)
+            rows = self.game._faces[rows]
+            rows.flags.writeable = counts.flags.writeable = False
+            self._cache['combo_counts', sort] = rows, counts
+        return self._cache['combo_counts', sort]
+
+    def _permute_counts(self, sort=True):
+        """
+        Counts distinct permutations of faces, returning the permutations (one per row) and their counts.
+        """
+        codes = self._results_codes()
+        if ('permute_counts', sort) not in self._cache:
+            rows, counts = _count_rows(codes, sort)
+            rows = self.game._faces[rows]
+            rows.flags.writeable = counts.flags.writeable = False
+            self._cache['permute_counts', sort] = rows, counts
+        return self._cache['permute_counts', sort]
 
     def jackpot(self):
         """
@@ -180,10 +469,7 @@ class Analyzer:
         Returns:
             int: The number of jackpots in the results.
         """
-        
-        jackpot = self.game.results.nunique(axis=1) == 1
-        jackpot_count = sum(jackpot)
-        return jackpot_count
+        return self._jackpot_count()
 
     def face_counts_per_roll(self):
         """
@@ -192,34 +478,35 @@ class Analyzer:
         Returns:
             pandas.DataFrame: A DataFrame with roll number as index and face counts as columns.
         """
-        all_faces = self.game.results.stack().unique()
-        face_counts = self.game.results.apply(lambda row: row.value_counts(), axis=1).fillna(0)
-        face_counts_df = pd.DataFrame(face_counts)
-        face_counts_df = face_counts_df.reindex(columns=all_faces, fill_value=0)
-        face_counts_df.index.name = 'Roll'
+        counts = self._face_counts()
+        face_counts_df = pd.DataFrame(counts, index=pd.RangeIndex(1, counts.shape[0] + 1, name='Roll'),
+                                      columns=self.game._faces, copy=True)
         return face_counts_df
 
-    def combo_counts(self):
+    def combo_counts(self, sort=True):
         """
         Computes distinct combinations of faces rolled and their counts.
         
+        Parameters:
+            sort (bool): Whether to order the combinations by count, most frequent first. Defaults to True.
+        
         Returns:
             pandas.DataFrame: A DataFrame with distinct combinations and their counts.
         """
-        
-        combos = self.game.results.apply(lambda row: tuple(sorted(row)), axis=1)
-        combo_counts = combos.value_counts()
-        combo_counts_df = pd.DataFrame({'Count': combo_counts})
+        rows, counts = self._combo_counts(sort)
+        combo_counts_df = pd.DataFrame({'Count': counts}, index=pd.MultiIndex.from_arrays(rows.T), copy=True)
         return combo_counts_df
 
-    def permute_counts(self):
+    def permute_counts(self, sort=True):
         """
         Computes distinct permutations of faces rolled and their counts.
         
+        Parameters:
+            sort (bool): Whether to order the permutations by count, most frequent first. Defaults to True.
+        
         Returns:
             pandas.DataFrame: A DataFrame with distinct permutations and their counts.
         """
-        perms = self.game.results.apply(lambda row: tuple(row), axis=1)
-        perm_counts = perms.value_counts()
-        perm_counts_df = pd.DataFrame({'Count': perm_counts}).set_index(perm_counts.index)
+        rows, counts = self._permute_counts(sort)
+        perm_counts_df = pd.DataFrame({'Count': counts}, index=pd.MultiIndex.from_arrays(rows.T), copy=True)
         return perm_counts_df
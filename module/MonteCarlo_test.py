@@ -1,6 +1,10 @@
+import importlib.util
 import unittest
+import warnings
+from unittest import mock
 import numpy as np
 import pandas as pd
+import MonteCarlo
 from MonteCarlo import Die, Game, Analyzer 
 
 class TestDie(unittest.TestCase):
@@ -14,12 +18,25 @@ class TestDie(unittest.TestCase):
         self.assertEqual(list(self.die.faces), [1, 2, 3, 4, 5, 6])
         self.assertTrue(np.array_equal(self.die.weights, np.ones(6)))
 
+        with self.assertRaises(TypeError):
+            Die(faces=[1, 2, 3])
+
+        with self.assertRaises(ValueError):
+            Die(faces=np.array(['H', 'T', 'H']))
+
+        # A die without faces can be created but not played
+        empty_die = Die(faces=np.array([]))
+        with self.assertRaises(ValueError):
+            empty_die.roll(times=1)
+        with self.assertRaises(ValueError):
+            Game(dice=[empty_die]).play(rolls=1)
+
     def test_change_weight(self):
         '''
         Test changing the weight of a face, invalid face change, and invalid weight type
         '''
         self.die.change_weight(1, 2.0)
-        self.assertEqual(self.die.df.loc[1, 'weights'], 2.0)
+        self.assertEqual(self.die.show_state().loc[1, 'weights'], 2.0)
 
         with self.assertRaises(IndexError):
             self.die.change_weight(7, 2.0)
@@ -27,19 +44,77 @@ class TestDie(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.die.change_weight(1, "string")
 
+        for weight in [-1.0, float('nan'), float('inf')]:
+            with self.assertRaises(ValueError):
+                self.die.change_weight(1, weight)
+        self.assertEqual(self.die.weights[0], 2.0)
+
     def test_roll(self):
         '''
         Test that roll produces the expected output.
         '''
         result = self.die.roll(times=3)
         self.assertEqual(len(result), 3)
+        self.assertTrue(np.all(np.isin(result, self.die.faces)))
+
+        # A face with zero weight should never be rolled
+        for face in [1, 2, 3, 4, 5]:
+            self.die.change_weight(face, 0)
+        self.assertTrue(np.all(self.die.roll(times=50) == 6))
+
+        # A die with no weight left can't be rolled
+        self.die.change_weight(6, 0)
+        with self.assertRaises(ValueError):
+            self.die.roll(times=1)
         
-    def test_show_state_returns_copy(self):
+    def test_search_cdf(self):
+        '''
+        Test that the CDF search used by the numba kernel matches np.searchsorted, including zero-weight faces.
+        '''
+        self._check_cdf_search(MonteCarlo._search_cdf)
+
+    @unittest.skipIf(importlib.util.find_spec("numba") is None, "numba is not installed")
+    def test_search_cdf_numba(self):
+        '''
+        Test that the compiled numba kernel matches np.searchsorted, including zero-weight faces, and is used by roll.
+        '''
+        self._check_cdf_search(MonteCarlo._numba_search_cdf())
+
+        with mock.patch('MonteCarlo.use_numba', True):
+            self.assertTrue(np.all(np.isin(self.die.roll(times=20), self.die.faces)))
+
+    def _check_cdf_search(self, search):
+        for weights in [np.ones(6), np.array([0.0, 1.0, 0.0, 0.0, 2.0, 0.0]), np.array([3.0, 0.0, 0.0]), np.array([5.0])]:
+            cdf = np.cumsum(weights)
+            # Random draws plus the draws that land exactly on each CDF step below the total
+            u = np.concatenate([np.random.default_rng(0).random(1000) * cdf[-1], [0.0], cdf[cdf < cdf[-1]]])
+            idx = search(cdf, u)
+            self.assertTrue(np.array_equal(idx, np.searchsorted(cdf, u, side='right')))
+            self.assertTrue(np.all(weights[idx] > 0))
+
+    def test_roll_seed(self):
+        '''
+        Test that two dice with the same seed roll the same faces.
+        '''
+        die1 = Die(faces=np.array([1, 2, 3, 4, 5, 6]), seed=42)
+        die2 = Die(faces=np.array([1, 2, 3, 4, 5, 6]), seed=42)
+        self.assertTrue(np.array_equal(die1.roll(times=20), die2.roll(times=20)))
+        
+    def test_show_state_returns_view(self):
         """
-        Test that the show_state method returns a dataframe.
+        Test that the show_state method returns a read-only dataframe that later weight changes don't alter.
         """
         die_state = self.die.show_state()
         self.assertIsInstance(die_state, pd.DataFrame)
+        self.assertEqual(list(die_state.index), [1, 2, 3, 4, 5, 6])
+
+        with self.assertRaises(ValueError):
+            die_state.loc[1, 'weights'] = 5.0
+        self.assertEqual(self.die.weights[0], 1.0)
+
+        self.die.change_weight(1, 3.0)
+        self.assertEqual(die_state.loc[1, 'weights'], 1.0)
+        self.assertEqual(self.die.show_state().loc[1, 'weights'], 3.0)
 
 
 class TestGame(unittest.TestCase):
@@ -63,6 +138,110 @@ class TestGame(unittest.TestCase):
         self.assertEqual(self.game.results.shape[0], 5)
         self.assertEqual(self.game.results.shape[1], 2)  
 
+    def test_play_uses_weights(self):
+        '''
+        Test that play respects the weights of each die, so a face with all the weight is always rolled.
+        '''
+        for face in [1, 2, 3, 4, 5]:
+            self.game.dice[0].change_weight(face, 0.0)
+        self.game.play(rolls=50)
+        self.assertTrue((self.game.results["Die 0"] == 6).all())
+
+        # A die with no weight left is rejected without any division warnings
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.game.dice[0].change_weight(6, 0.0)
+            with self.assertRaises(ValueError):
+                self.game.play(rolls=5)
+
+    def test_play_seed(self):
+        '''
+        Test that two games with the same seed produce the same results.
+        '''
+        game1 = Game(dice=self.game.dice, seed=7)
+        game2 = Game(dice=self.game.dice, seed=7)
+        game1.play(rolls=20)
+        game2.play(rolls=20)
+        self.assertTrue(game1.results.equals(game2.results))
+
+    def test_play_mixed_dice(self):
+        '''
+        Test that play handles dice with different faces, rolling each die from its own faces.
+        '''
+        game = Game(dice=[Die(faces=np.array(['a', 'b'])), Die(faces=np.array(['b', 'c', 'd']))])
+        game.play(rolls=20)
+        self.assertTrue(game.results['Die 0'].isin(['a', 'b']).all())
+        self.assertTrue(game.results['Die 1'].isin(['b', 'c', 'd']).all())
+
+    def test_set_results(self):
+        '''
+        Test that results can be assigned directly and are then shown and analyzed like played results.
+        '''
+        results = pd.DataFrame({'Die 0': [1, 2, 2], 'Die 1': [1, 2, 3]}, index=pd.RangeIndex(1, 4, name='Roll'))
+        self.game.results = results
+        self.assertTrue(self.game.show_results().equals(results))
+        self.assertEqual(self.game.show_results(form="narrow").loc[(3, 'Die 1'), 'Outcome'], 3)
+        self.assertEqual(Analyzer(self.game).jackpot(), 2)
+
+        self.game.results = None
+        with self.assertRaises(ValueError):
+            self.game.show_results()
+
+        with self.assertRaises(ValueError):
+            self.game.results = pd.DataFrame({'Die 0': [1.0, np.nan]})
+
+    def test_play_mixed_types(self):
+        '''
+        Test that dice with faces of different types keep their own values in the results.
+        '''
+        game = Game(dice=[Die(faces=np.array([1, 2])), Die(faces=np.array(['a', 'b']))])
+        game.play(rolls=20)
+        self.assertTrue(game.results['Die 0'].isin([1, 2]).all())
+        self.assertEqual(game.results['Die 0'].dtype, np.int64)
+        self.assertTrue(game.results['Die 1'].isin(['a', 'b']).all())
+        self.assertTrue(game.show_results(form="narrow").loc[(1, 'Die 0'), 'Outcome'] in [1, 2])
+        self.assertEqual(Analyzer(game).face_counts_per_roll().shape, (20, 4))
+
+        game = Game(dice=[Die(faces=np.array([1, 2])), Die(faces=np.array([1.5, 2.5]))])
+        game.play(rolls=20)
+        self.assertEqual(game.results['Die 0'].dtype, np.int64)
+        self.assertEqual(game.results['Die 1'].dtype, np.float64)
+
+    def test_play_dice_changes(self):
+        '''
+        Test that a game with no dice can be created but not played, and that dice added after creation are rolled.
+        '''
+        game = Game(dice=[])
+        with self.assertRaises(ValueError):
+            game.play(rolls=5)
+
+        game.dice.append(Die(faces=np.array([1, 2])))
+        game.dice.append(Die(faces=np.array([3, 4])))
+        game.play(rolls=5)
+        self.assertTrue(game.results['Die 1'].isin([3, 4]).all())
+
+    def test_play_parallel(self):
+        '''
+        Test that rolling the dice in separate processes respects the weights and gives a seeded game the same results
+        as rolling them in this process.
+        '''
+        die1 = Die(faces=np.array([1, 2, 3, 4, 5, 6]))
+        die2 = Die(faces=np.array([1, 2, 3, 4, 5, 6]))
+        for face in [1, 2, 3, 4, 5]:
+            die1.change_weight(face, 0.0)  # also keeps the dice unequal so they aren't rolled in one call
+        results = []
+        for cpus, threshold in [(2, 0), (1, 0), (2, None)]:
+            with mock.patch('MonteCarlo.os.cpu_count', return_value=cpus):
+                game = Game(dice=[die1, die2], seed=11)
+                game.parallel_threshold = threshold
+                game.play(rolls=50)
+                results.append(game.results)
+        self.assertEqual(results[0].shape, (50, 2))
+        self.assertTrue((results[0]['Die 0'] == 6).all())
+        self.assertTrue(results[0]['Die 1'].isin([1, 2, 3, 4, 5, 6]).all())
+        self.assertTrue(results[0].equals(results[1]))
+        self.assertTrue(results[0].equals(results[2]))
+
     def test_show_results(self):
         '''
         Test that show_results returns the DataFrame in wide and narrow formats, and checks the index for both.
@@ -75,7 +254,9 @@ class TestGame(unittest.TestCase):
         self.game.play(rolls=5)
         results_narrow = self.game.show_results(form="narrow")
         self.assertIsInstance(results_narrow, pd.DataFrame)
-        self.assertEqual(results_narrow.index.names, ['Roll', 'Die'])           
+        self.assertEqual(results_narrow.index.names, ['Roll', 'Die'])
+        self.assertEqual(results_narrow.shape, (10, 1))
+        self.assertEqual(results_narrow.loc[(2, 'Die 1'), 'Outcome'], self.game.results.loc[2, 'Die 1'])           
             
 
 class TestAnalyzer(unittest.TestCase):
@@ -104,6 +285,17 @@ class TestAnalyzer(unittest.TestCase):
         '''
         self.assertIsInstance(self.analyzer.jackpot(), int)
 
+        # Every roll of two one-sided dice is a jackpot
+        game = Game(dice=[Die(faces=np.array(['A'])), Die(faces=np.array(['A']))])
+        game.play(rolls=4)
+        self.assertEqual(Analyzer(game).jackpot(), 4)
+
+        # Wide games should agree with a row-by-row check
+        game = Game(dice=[Die(faces=np.array([1, 2])) for _ in range(16)])
+        game.play(rolls=2000)
+        expected = sum(len(set(row)) == 1 for row in game.results.itertuples(index=False))
+        self.assertEqual(Analyzer(game).jackpot(), expected)
+
     def test_face_counts_per_roll(self):
         '''
         Test that face counts are calculated correctly, checking that it returns a dataframe, the index name is correct, and all counts determined are the faces of our dice.
@@ -112,6 +304,8 @@ class TestAnalyzer(unittest.TestCase):
         self.assertIsInstance(face_counts, pd.DataFrame)
         self.assertEqual(face_counts.index.name, 'Roll')
         self.assertTrue(np.all(face_counts.columns.isin([1, 2, 3, 4, 5, 6])))
+        self.assertTrue(np.all(face_counts.sum(axis=1) == 2))
+        self.assertEqual(list(face_counts.columns), [1, 2, 3, 4, 5, 6])
 
     def test_combo_counts(self):
         '''
@@ -120,6 +314,8 @@ class TestAnalyzer(unittest.TestCase):
         combo_counts = self.analyzer.combo_counts()
         self.assertIsInstance(combo_counts, pd.DataFrame)
         self.assertIn('Count', combo_counts.columns)
+        self.assertEqual(combo_counts['Count'].sum(), 5)
+        self.assertTrue(all(list(combo) == sorted(combo) for combo in combo_counts.index))
 
     def test_permute_counts(self):
         '''
@@ -128,6 +324,26 @@ class TestAnalyzer(unittest.TestCase):
         perm_counts = self.analyzer.permute_counts()
         self.assertIsInstance(perm_counts, pd.DataFrame)
         self.assertIn('Count', perm_counts.columns)
+        self.assertEqual(perm_counts['Count'].sum(), 5)
+        self.assertTrue(perm_counts['Count'].is_monotonic_decreasing)
+
+        unsorted_counts = self.analyzer.permute_counts(sort=False)
+        self.assertTrue(unsorted_counts.sort_index().equals(perm_counts.sort_index()))
+
+    def test_cache_refreshes_after_play(self):
+        '''
+        Test that repeated calls give the same answer and that playing the game again refreshes the analysis.
+        '''
+        self.assertTrue(self.analyzer.permute_counts().equals(self.analyzer.permute_counts()))
+
+        # Changing a returned DataFrame should not change later answers
+        face_counts = self.analyzer.face_counts_per_roll()
+        face_counts.iloc[0, 0] = 99
+        self.assertNotEqual(self.analyzer.face_counts_per_roll().iloc[0, 0], 99)
+
+        self.game.play(rolls=8)
+        self.assertEqual(self.analyzer.permute_counts()['Count'].sum(), 8)
+        self.assertEqual(self.analyzer.face_counts_per_roll().shape[0], 8)
 
 
 if __name__ == '__main__':
@@ -9,5 +9,6 @@ setup(
 	author_email='tkz5ry@virginia.edu',
 	license='MIT',
 	packages=['module'],
-	install_requires=['numpy', 'pandas']
+	install_requires=['numpy', 'pandas'],
+	extras_require={'numba': ['numba']}
 )